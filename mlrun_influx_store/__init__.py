@@ -1,42 +1,44 @@
-# mlrun_influx_store/__init__.py
-from .datastore import InfluxStore
-from .targetstore import InfluxTarget
+import importlib
+
+# Public names and the submodule defining them. Nothing heavy (pandas,
+# influxdb_client, mlrun) is imported until one of them is first accessed (PEP 562).
+_LAZY_ATTRS = {
+    "InfluxStore": ".datastore",
+    "InfluxTarget": ".targetstore",
+    "clear_cache": ".datastore",
+    "get_dataitem": ".api",
+    "read_df": ".api",
+    "read_dfs": ".api",
+    "log_dataset": ".api",
+    "write_df": ".api",
+    "write_records": ".api",
+}
 
 # Register the InfluxTarget with MLRun's target system
 def _register_influx_target():
-    """Register InfluxTarget with MLRun's kind_to_driver mapping."""
+    """Register InfluxTarget with MLRun (TargetTypes + kind_to_driver), see targetstore."""
     try:
-        from mlrun.datastore.targets import kind_to_driver, TargetTypes
-
-        # Add influx to TargetTypes if not already there
-        if not hasattr(TargetTypes, 'influx'):
-            TargetTypes.influx = "influx"
-
-        # Register the target driver
-        kind_to_driver["influx"] = InfluxTarget
-
+        importlib.import_module(".targetstore", __name__)  # registers on first import
     except ImportError:
         # MLRun not available, skip registration
         pass
 
-# Register on import
-_register_influx_target()
 
-# lazy re-exports to keep import light
-def get_dataitem(uri: str, ctx=None):
-    from .api import get_dataitem as _gd
-    return _gd(uri, ctx=ctx)
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    if name in ("InfluxStore", "InfluxTarget"):
+        # registration used to run on package import; do it on first real use instead
+        _register_influx_target()
+    globals()[name] = value  # cache: later lookups skip __getattr__
+    return value
 
-def read_df(uri: str, ctx=None):
-    from .api import read_df as _rd
-    return _rd(uri, ctx=ctx)
 
-def log_dataset(*args, **kwargs):
-    from .api import log_dataset as _ld
-    return _ld(*args, **kwargs)
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
-def write_df(*args, **kwargs):
-    from .api import write_df as _wd
-    return _wd(*args, **kwargs)
 
-__all__ = ["InfluxStore", "InfluxTarget", "get_dataitem", "read_df", "log_dataset", "write_df"]
+__all__ = ["InfluxStore", "InfluxTarget", "get_dataitem", "read_df", "read_dfs", "log_dataset", "write_df",
+           "write_records", "clear_cache"]
@@ -0,0 +1,21 @@
+# mlrun_influx_store/_entrypoint.py
+"""
+Entry-point target for the ``influx`` datastore kind. Loading an entry point imports
+its module, so this one imports nothing: the real store (and with it pandas, MLRun's
+datastore base and, on first query, influxdb_client) is loaded when a store is built.
+"""
+
+
+class _LazyInfluxStore:
+    """Stand-in for InfluxStore: building it (or from_spec) returns a real InfluxStore."""
+
+    def __new__(cls, *args, **kwargs):
+        from .datastore import InfluxStore
+
+        return InfluxStore(*args, **kwargs)
+
+    @classmethod
+    def from_spec(cls, *args, **kwargs):
+        from .datastore import InfluxStore
+
+        return InfluxStore.from_spec(*args, **kwargs)
@@ -1,14 +1,30 @@
 # mlrun_influx_store/api.py
-from urllib.parse import parse_qs
+import functools
+import math
+from collections.abc import Iterable, Mapping
+from types import MappingProxyType
+import numpy as np
 import pandas as pd
 import mlrun
 from mlrun.datastore.base import DataItem
 from mlrun.datastore import store_manager
-from .datastore import InfluxStore
+from .datastore import InfluxStore, _parse_key, _resolve_config, _write_batched
 
 
 # --- core helpers ------------------------------------------------------------
 
+_STORE_CACHE: dict[tuple[str, str], InfluxStore] = {}
+
+
+def _get_store() -> InfluxStore:
+    """One InfluxStore per (schema, name), reused by all module-level helpers."""
+    key = ("influx", "influx")
+    store = _STORE_CACHE.get(key)
+    if store is None:
+        store = _STORE_CACHE[key] = InfluxStore(parent=store_manager, schema="influx", name="influx", endpoint="")
+    return store
+
+
 def get_dataitem(uri: str, ctx=None) -> DataItem:
     """
     Return a DataItem that already has the DataFrame loaded in _body.
@@ -17,9 +33,8 @@ def get_dataitem(uri: str, ctx=None) -> DataItem:
     if not uri.startswith("influx://"):
         raise ValueError("URI must start with influx://")
     key = uri.split("://", 1)[1]
-    store = InfluxStore(parent=store_manager, schema="influx", name="influx", endpoint="")
     # noinspection PyArgumentList
-    return store.get(key, ctx=ctx)  # <-- pass ctx
+    return _get_store().get(key, ctx=ctx)  # <-- pass ctx
 
 
 def read_df(uri: str, ctx=None) -> pd.DataFrame:
@@ -28,28 +43,34 @@ def read_df(uri: str, ctx=None) -> pd.DataFrame:
     return getattr(item, "_body", None)  # DF is set by store.get(...)
 
 
-# --- logging with MLRun labels & tag -----------------------------------------
+def read_dfs(uris: list[str], ctx=None) -> list[pd.DataFrame]:
+    """read_df for several influx:// URIs, queried concurrently (needs the 'async' extra)."""
+    if not all(uri.startswith("influx://") for uri in uris):
+        raise ValueError("URI must start with influx://")
+    items = _get_store().get_many([uri.split("://", 1)[1] for uri in uris], ctx=ctx)
+    return [getattr(item, "_body", None) for item in items]
 
-def _auto_labels_from_uri(uri: str) -> dict:
-    """Small, safe set of labels derived from the query itself (low cardinality)."""
-    key = uri.split("://", 1)[1]
-    path, query = (key.split("?", 1) + [""])[:2]
-    bucket, measurement = path.split("/", 1)
-    q = parse_qs(query)
 
-    env = (q.get("env", ["DEV"])[0] or "DEV").upper()
-    field = q.get("field", [None])[0]
-    rng = q.get("range", [None])[0]
+# --- logging with MLRun labels & tag -----------------------------------------
+
+@functools.lru_cache(maxsize=1024)
+def _auto_labels_from_uri(uri: str) -> Mapping[str, str]:
+    """
+    Small, safe set of labels derived from the query itself (low cardinality).
+    Cached per URI, hence returned read-only.
+    """
+    k = _parse_key(uri.split("://", 1)[1])
 
     labels = {
         "store": "influx",
-        "env": env,
-        "bucket": bucket,
-        "measurement": measurement,
+        "env": k.env,
+        "bucket": k.bucket,
+        "measurement": k.measurement,
     }
-    if field: labels["field"] = field
-    if rng:   labels["range"] = rng
-    return labels
+    if k.field: labels["field"] = k.field
+    if k.range: labels["range"] = k.range
+    if k.agg:   labels["agg"] = k.agg if ":" in k.agg else f"{k.agg}:{k.window}"
+    return MappingProxyType(labels)
 
 
 def _labels_from_columns(df: pd.DataFrame, cols: list[str], max_len: int = 64) -> dict:
@@ -61,7 +82,9 @@ def _labels_from_columns(df: pd.DataFrame, cols: list[str], max_len: int = 64) -
     for c in cols or []:
         if c in df.columns:
             # up to 4 unique values, stringified, joined with '|'
-            uniq = list(pd.Series(df[c].dropna().astype(str)).unique())[:4]
+            # (dedupe the raw values first so each distinct value is stringified once, then
+            # the strings: 1 and "1" are one label value)
+            uniq = list(dict.fromkeys(df[c].dropna().drop_duplicates().astype(str)))[:4]
             if uniq:
                 val = "|".join(uniq)
                 out[f"col_{c}"] = val[:max_len]
@@ -108,8 +131,107 @@ def log_dataset(
 
 # --- optional: write to Influx with Influx tags -------------------------------
 
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
+# line-protocol escaping (same rules as influxdb_client's Point)
+_ESCAPE_MEASUREMENT = str.maketrans({",": r"\,", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r"})
+_ESCAPE_KEY = str.maketrans({",": r"\,", "=": r"\=", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r"})
+_ESCAPE_STRING = str.maketrans({'"': r'\"', "\\": r"\\"})
+
+_WRITE_CHUNK = 5_000  # rows rendered per pass
+
+
+def _format_object(v):
+    """
+    Best-effort field rendering for object columns (numbers first, then strings).
+    Returns None for values Influx cannot store (NaN/inf).
+    """
+    if isinstance(v, (bool, np.bool_)):
+        return "true" if v else "false"
+    if isinstance(v, (int, np.integer)):
+        return f"{v}i"
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return '"' + str(v).translate(_ESCAPE_STRING) + '"'
+    if not math.isfinite(f):
+        return None
+    s = str(f)
+    return s[:-2] if s.endswith(".0") else s
+
+
+def _render_field(s: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Render one field column to line-protocol values.
+    The dtype is inspected once per column, so there is no per-cell type branching
+    for numeric/bool columns. Returns (rendered, valid_mask).
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype(object)  # map() on a categorical would return a Categorical, not strings
+    valid = s.notna()
+    kind = s.dtype.kind
+    if kind == "b":
+        return s.map({True: "true", False: "false"}), valid
+    if kind in "iu":
+        return s.astype(str) + "i", valid
+    if kind == "f":
+        valid &= np.isfinite(s.to_numpy(dtype=float, na_value=np.nan))
+        return s.astype(str).str.replace(r"\.0$", "", regex=True), valid
+    rendered = s.map(_format_object, na_action="ignore")
+    return rendered, valid & rendered.notna()
+
+
+def _masked(part: pd.Series, valid: pd.Series) -> pd.Series:
+    """Blank out entries of ``part`` where ``valid`` is False (no-op for dense columns)."""
+    valid = valid.to_numpy(dtype=bool)
+    return part if valid.all() else part.where(valid, "")
+
+
+def _to_line_protocol(
+        df: pd.DataFrame,
+        measurement: str,
+        time_col: str,
+        tag_cols: list[str],
+        field_cols: list[str],
+) -> pd.Series:
+    """
+    Build Influx line-protocol strings column-by-column (one vectorized pass per column
+    instead of a Point object per row). Rows without any valid field are dropped.
+    """
+    ts = pd.to_datetime(df[time_col], utc=True).dt.tz_localize(None)
+    ts_ns = ts.astype("datetime64[ns]").astype("int64").astype(str)
+
+    head = pd.Series(str(measurement).translate(_ESCAPE_MEASUREMENT), index=df.index, dtype=object)
+    for c in sorted(c for c in tag_cols if c in df.columns):
+        vals = df[c].astype(str).str.translate(_ESCAPE_KEY)
+        ok = df[c].notna() & (vals != "")
+        head = head + _masked("," + str(c).translate(_ESCAPE_KEY) + "=" + vals, ok)
+
+    body = pd.Series("", index=df.index, dtype=object)
+    for c in field_cols:
+        if c not in df.columns:
+            continue
+        rendered, ok = _render_field(df[c])
+        body = body + _masked("," + str(c).translate(_ESCAPE_KEY) + "=" + rendered, ok)
+
+    lines = head + " " + body.str[1:] + " " + ts_ns
+    has_fields = (body != "").to_numpy()
+    return lines if has_fields.all() else lines[has_fields]
+
+
+def _iter_line_protocol(df, measurement, time_col, tag_cols, field_cols, chunk_rows=_WRITE_CHUNK):
+    """Yield line-protocol strings for ``df``, rendering ``chunk_rows`` rows at a time."""
+    for start in range(0, len(df), chunk_rows):
+        yield from _to_line_protocol(
+            df.iloc[start:start + chunk_rows], measurement, time_col, tag_cols, field_cols
+        )
+
+
+def _write_target(uri: str) -> tuple[str, str, str, str, str]:
+    """Resolve (bucket, measurement, url, org, token) for a write URI."""
+    k = _parse_key(uri.split("://", 1)[1])
+    influx_url, influx_org, token = _resolve_config(k.env, k.url, k.org, k.token, k.token_secret)
+    if not (influx_url and influx_org and token):
+        raise ValueError(f"Missing Influx config for env={k.env} (url/org/token).")
+    return k.bucket, k.measurement, influx_url, influx_org, token
 
 
 def write_df(
@@ -127,57 +249,86 @@ def write_df(
       write_df("influx://bucket/measurement?env=STAGING&token_secret=INFLUX_STAGING_TOKEN",
                df, time_col="time", tag_cols=["sensor","asset_id","span_id"], field_cols=["value"])
     """
-    key = uri.split("://", 1)[1]
-    path, query = (key.split("?", 1) + [""])[:2]
-    if "/" not in path:
-        raise ValueError("URI path must look like bucket/measurement")
-    bucket, measurement = path.split("/", 1)
-    q = parse_qs(query)
-
-    # resolve config via your store's rules
-    from .datastore import InfluxStore
-    # reuse the store's resolver by briefly constructing and reusing its parsing logic:
-    _store = InfluxStore(parent=store_manager, schema="influx", name="influx", endpoint="")
-    # DRY: minimally re-parse what we need here (could be refactored to a shared util if desired)
-    env = (q.get("env", ["DEV"])[0] or "DEV").upper()
-    url_override = q.get("url", [None])[0]
-    org_override = q.get("org", [None])[0]
-    token_inline = q.get("token", [None])[0]
-    token_secret = q.get("token_secret", [None])[0]
-
-    import os
-    influx_url = url_override or os.environ.get(f"INFLUX_{env}_URL")
-    influx_org = org_override or os.environ.get(f"INFLUX_{env}_ORG")
-    token = token_inline or mlrun.get_secret_or_env(token_secret or f"INFLUX_{env}_TOKEN")
-    if not (influx_url and influx_org and token):
-        raise ValueError(f"Missing Influx config for env={env} (url/org/token).")
+    bucket, measurement, influx_url, influx_org, token = _write_target(uri)
 
     # infer field columns if not provided
     if field_cols is None:
         field_cols = [c for c in df.columns if c not in ([time_col] + (tag_cols or []))]
 
-    ts = pd.to_datetime(df[time_col], utc=True)
-    client = InfluxDBClient(url=influx_url, token=token, org=influx_org)
-    write_api = client.write_api(write_options=SYNCHRONOUS)
-
-    points = []
-    for i, row in df.iterrows():
-        p = Point(measurement).time(ts.iloc[i].to_pydatetime())
-        for c in tag_cols or []:
-            if c in df.columns and pd.notna(row[c]):
-                p = p.tag(c, str(row[c]))
-        for c in field_cols:
-            if c in df.columns and pd.notna(row[c]):
-                v = row[c]
-                if isinstance(v, (bool, int, float)):
-                    p = p.field(c, v)
-                else:
-                    # best effort cast
-                    try:
-                        p = p.field(c, float(v))
-                    except Exception:
-                        p = p.field(c, str(v))
-        points.append(p)
-
-    if points:
-        write_api.write(bucket=bucket, org=influx_org, record=points)
+    if df.empty:
+        return
+
+    # lines are rendered one row-chunk at a time and consumed by the batching writer,
+    # so the full payload is never materialized
+    lines = _iter_line_protocol(df, measurement, time_col, tag_cols or [], field_cols)
+    _write_batched(influx_url, influx_org, token, bucket, lines)
+
+
+def _to_ns(t) -> int:
+    """Epoch nanoseconds for an int (already ns), datetime, Timestamp or date string; naive = UTC."""
+    if isinstance(t, (int, np.integer)):
+        return int(t)
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.value
+
+
+def _record_lines(records, measurement, time_key, tag_keys, field_keys):
+    """Yield one line-protocol string per record (dicts or namedtuples), skipping field-less ones."""
+    meas = str(measurement).translate(_ESCAPE_MEASUREMENT)
+    tag_keys = sorted(tag_keys)
+    tag_prefixes = ["," + str(k).translate(_ESCAPE_KEY) + "=" for k in tag_keys]
+    excluded = {time_key, *tag_keys}
+    escaped_keys = {}
+    for rec in records:
+        if not isinstance(rec, Mapping):
+            rec = rec._asdict()
+        head = meas
+        for k, prefix in zip(tag_keys, tag_prefixes):
+            v = rec.get(k)
+            if v is not None and v == v:  # skip None/NaN
+                v = str(v).translate(_ESCAPE_KEY)
+                if v:
+                    head += prefix + v
+        fields = []
+        for k in (field_keys if field_keys is not None else [k for k in rec if k not in excluded]):
+            v = rec.get(k)
+            if v is None:
+                continue
+            rendered = _format_object(v)
+            if rendered is None:
+                continue
+            ek = escaped_keys.get(k)
+            if ek is None:
+                ek = escaped_keys[k] = str(k).translate(_ESCAPE_KEY)
+            fields.append(f"{ek}={rendered}")
+        if not fields:
+            continue
+        t = rec.get(time_key)
+        line = f"{head} {','.join(fields)}"
+        yield line if t is None else f"{line} {_to_ns(t)}"
+
+
+def write_records(
+        uri: str,
+        records: Iterable,
+        *,
+        time_key: str = "time",
+        tag_keys: Iterable[str] = (),
+        field_keys: list[str] | None = None,
+):
+    """
+    Write an iterable of records (dicts, namedtuples, polars ``iter_rows(named=True)`` rows ...)
+    straight to Influx as line protocol, without building a pandas DataFrame.
+
+    Field values follow write_df's rules; records without a time get the server time.
+
+    Usage:
+      write_records("influx://bucket/measurement?env=STAGING",
+                    ({"time": t, "sensor": s, "value": v} for t, s, v in source),
+                    tag_keys=["sensor"])
+    """
+    bucket, measurement, influx_url, influx_org, token = _write_target(uri)
+    lines = _record_lines(records, measurement, time_key, tag_keys, field_keys)
+    _write_batched(influx_url, influx_org, token, bucket, lines)
@@ -1,12 +1,468 @@
-from urllib.parse import parse_qs
+from urllib.parse import unquote_plus
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import atexit
+import functools
+import itertools
 import os
+import re
+import string
+import threading
+import time
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
+
 import pandas as pd
-from influxdb_client import InfluxDBClient
 
 import mlrun
 from mlrun.datastore.base import DataStore, DataItem
 from mlrun.utils import logger
 
+# Flux bookkeeping columns that are not part of the result
+_FLUX_DROP_COLUMNS = ["result", "table", "_start", "_stop"]
+_FLUX_RENAMES = {"_time": "time", "_field": "field", "_value": "value", "_measurement": "measurement"}
+_RESULT_COLUMNS = list(_FLUX_RENAMES.values())
+
+# shared clients per (url, org, token), least recently used first (see _pooled)
+_CLIENTS: "OrderedDict[tuple, tuple]" = OrderedDict()
+_MAX_CLIENTS = 8
+_CLIENTS_LOCK = threading.Lock()
+
+# tokens from env/secrets and from the run context: (source, name) -> (value, monotonic time)
+_SECRET_CACHE: dict[tuple[str, str], tuple[str, float]] = {}
+_SECRET_TTL_S = 300
+_SECRET_LOCK = threading.Lock()
+
+# InfluxStore.get_iter: first sub-range, and the floor when halving it
+_ITER_FIRST_CHUNK = pd.Timedelta(hours=1)
+_ITER_MIN_CHUNK = pd.Timedelta(seconds=1)
+
+
+def _pooled(url: str, org: str, token: str) -> tuple:
+    """
+    Shared (client, query API) per (url, org, token): keeps the HTTP connection pool warm across
+    calls. gzip is enabled since the annotated-CSV query responses compress very well.
+    Beyond _MAX_CLIENTS the least recently used client is closed, so its pool does not linger.
+    """
+    key = (url, org, token)
+    with _CLIENTS_LOCK:
+        entry = _CLIENTS.get(key)
+        if entry is not None:
+            _CLIENTS.move_to_end(key)
+            return entry
+        # imported here: influxdb_client (urllib3, reactivex, ...) is only paid for on first use
+        from influxdb_client import InfluxDBClient
+
+        client = InfluxDBClient(url=url, token=token, org=org, enable_gzip=True)
+        entry = _CLIENTS[key] = (client, client.query_api())
+        evicted = _CLIENTS.popitem(last=False)[1][0] if len(_CLIENTS) > _MAX_CLIENTS else None
+    if evicted is not None:
+        evicted.close()
+    return entry
+
+
+def _get_client(url: str, org: str, token: str):
+    return _pooled(url, org, token)[0]
+
+
+def _get_query_api(url: str, org: str, token: str):
+    return _pooled(url, org, token)[1]
+
+
+_WRITE_BATCH_SIZE = 5_000
+_WRITE_FLUSH_INTERVAL_MS = 1_000
+
+
+def _write_sync(url: str, org: str, token: str, bucket: str, records, **write_kwargs):
+    """
+    Write ``records`` in one synchronous request on the shared client: no batching thread
+    to start and wait for, and a write error is raised straight away.
+    """
+    from influxdb_client import WritePrecision
+    from influxdb_client.client.write_api import SYNCHRONOUS
+
+    _get_client(url, org, token).write_api(write_options=SYNCHRONOUS).write(
+        bucket=bucket, org=org, record=records, write_precision=WritePrecision.NS, **write_kwargs
+    )
+
+
+def _write_batched(url: str, org: str, token: str, bucket: str, records, **write_kwargs):
+    """
+    Write ``records`` (line-protocol strings or point dicts, or anything else
+    ``WriteApi.write`` accepts together with ``write_kwargs``).
+
+    Up to _WRITE_BATCH_SIZE records fit in one request and go out synchronously
+    (_write_sync): a batching writer would cost a thread start and a close() that polls
+    every 100 ms. Larger payloads go through a batching write API, so serialization and
+    HTTP writes overlap; the call returns once everything is flushed and re-raises the
+    first write error (the batching API would otherwise only log it).
+    """
+    if isinstance(records, pd.DataFrame):
+        small = len(records) <= _WRITE_BATCH_SIZE
+    else:
+        # look ahead one batch (plus one record) without materializing a large payload
+        records = iter(records)
+        head = list(itertools.islice(records, _WRITE_BATCH_SIZE + 1))
+        small = len(head) <= _WRITE_BATCH_SIZE
+        records = head if small else itertools.chain(head, records)
+    if small:
+        if len(records):
+            _write_sync(url, org, token, bucket, records, **write_kwargs)
+        return
+
+    from influxdb_client import WritePrecision
+    from influxdb_client.client.write_api import WriteOptions
+
+    errors = []
+    write_api = _get_client(url, org, token).write_api(
+        write_options=WriteOptions(
+            batch_size=_WRITE_BATCH_SIZE, flush_interval=_WRITE_FLUSH_INTERVAL_MS, jitter_interval=0
+        ),
+        error_callback=lambda conf, data, exc: errors.append(exc),
+    )
+    try:
+        write_api.write(bucket=bucket, org=org, record=records, write_precision=WritePrecision.NS,
+                        **write_kwargs)
+    finally:
+        write_api.close()  # blocks until pending batches are written
+    if errors:
+        raise errors[0]
+
+
+@atexit.register
+def _close_clients():
+    # a late writer (e.g. a storey target finalizer) gets a fresh client, not a closed one
+    with _CLIENTS_LOCK:
+        clients = [client for client, _ in _CLIENTS.values()]
+        _CLIENTS.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:  # interpreter shutdown, best-effort
+            pass
+
+
+def _frame_from_flux(frames, dtype_backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    Merge the per-table DataFrames returned by the Flux query API into one result:
+    time/field/value/measurement first, then one flat column per Influx tag
+    (absent tags are NaN), instead of a dict of tags per row.
+
+    String columns become categoricals, or with ``dtype_backend`` (pandas >= 2.0,
+    e.g. "pyarrow") all columns are converted with ``DataFrame.convert_dtypes``.
+    """
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        df = pd.DataFrame({
+            "time": pd.Series(dtype="datetime64[ns, UTC]"),
+            "field": pd.Series(dtype=object),
+            "value": pd.Series(dtype=object),
+            "measurement": pd.Series(dtype=object),
+        })
+        tag_cols = []
+    else:
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        df = df.drop(columns=_FLUX_DROP_COLUMNS, errors="ignore").rename(columns=_FLUX_RENAMES)
+        tag_cols = [c for c in df.columns if c not in _FLUX_RENAMES.values()]
+        df = df[_RESULT_COLUMNS + tag_cols]
+    if dtype_backend:
+        out = df.convert_dtypes(dtype_backend=dtype_backend)
+        if df["value"].dtype.kind == "f":
+            # float fields stay float even when every value happens to be whole
+            out["value"] = df["value"].convert_dtypes(convert_integer=False, dtype_backend=dtype_backend)
+        return out
+    # field/measurement/tag values repeat heavily (Influx series keys): store them as categoricals
+    for c in ["field", "measurement", *tag_cols]:
+        df[c] = df[c].astype("category")
+    return df
+
+
+# escaping for values placed inside Flux string literals
+_FLUX_ESCAPE = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"})
+# range start: duration literal (-1h, -1d12h) or absolute RFC3339 time
+_FLUX_DURATION = r"(\d+(ns|us|µs|ms|s|mo|m|h|d|w|y))+"
+_FLUX_DURATION_RE = re.compile(f"^{_FLUX_DURATION}$")
+_FLUX_SIGNED_DURATION_RE = re.compile(f"^(-?)({_FLUX_DURATION})$")
+_FLUX_DURATION_PART_RE = re.compile(r"(\d+)(ns|us|µs|ms|s|mo|m|h|d|w|y)")
+# Flux duration units with a fixed length (mo/y depend on the calendar)
+_TIMEDELTA_UNITS = {"ns": "ns", "us": "us", "µs": "us", "ms": "ms", "s": "s", "m": "min", "h": "h", "d": "D", "w": "W"}
+_FLUX_RANGE_RE = re.compile(
+    f"^(-?{_FLUX_DURATION}"
+    r"|\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2}))?)$"
+)
+# _start/_stop are dropped server-side (after any aggregateWindow, which needs them):
+# they are identical on every row and only cost bytes on the wire.
+_FLUX_TEMPLATE = string.Template(
+    'from(bucket:"$bucket") |> range($range) '
+    '|> filter(fn: (r) => r._measurement == "$measurement")$extra '
+    '|> drop(columns: ["_start", "_stop"])'
+)
+# server-side aggregations accepted by agg=<fn>[:<window>]
+_AGG_FUNCTIONS = frozenset({"mean", "sum", "min", "max", "count", "last"})
+
+
+def _flux_str(value: str) -> str:
+    """Escape a value for use inside a double-quoted Flux string literal."""
+    return str(value).translate(_FLUX_ESCAPE).replace("${", "\\${")
+
+
+@dataclass(frozen=True)
+class _InfluxKey:
+    """Parsed form of "bucket/measurement?query" (the part of an influx:// URI after the scheme)."""
+
+    bucket: str
+    measurement: str
+    env: str = "DEV"
+    field: Optional[str] = None
+    tags: tuple = ()
+    range: Optional[str] = None
+    agg: Optional[str] = None
+    window: Optional[str] = None
+    dtype_backend: Optional[str] = None
+    # put(): DataFrame columns written as Influx tags (tags=colA,colB)
+    tag_columns: tuple = ()
+    # direct config overrides
+    url: Optional[str] = None
+    org: Optional[str] = None
+    token: Optional[str] = None
+    token_secret: Optional[str] = None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_key(key: str) -> _InfluxKey:
+    """Parse a key once; the result is immutable so it is safe to share from the cache."""
+    path, query = (key.split("?", 1) + [""])[:2]
+    if "/" not in path:
+        raise ValueError(f"Invalid key: {key}. Expected format 'bucket/measurement'")
+
+    bucket, measurement = path.split("/", 1)
+    params, tags = _parse_query(query)
+    return _InfluxKey(
+        bucket=bucket,
+        measurement=measurement,
+        env=params.get("env", "DEV").upper(),
+        field=params.get("field"),
+        tags=tuple(tags),
+        range=params.get("range"),
+        agg=params.get("agg"),
+        window=params.get("window"),
+        dtype_backend=params.get("dtype_backend"),
+        tag_columns=tuple(c for c in params.get("tags", "").split(",") if c),
+        url=params.get("url"),
+        org=params.get("org"),
+        token=params.get("token"),
+        token_secret=params.get("token_secret"),
+    )
+
+
+def _parse_query(query: str) -> tuple[dict, list]:
+    """
+    Minimal ``k=v&k=v`` parser: every key is single-valued (first wins) except the
+    repeatable ``tag``. Blank values are ignored, like parse_qs does by default.
+    """
+    params, tags = {}, []
+    for pair in query.split("&"):
+        k, _, v = pair.partition("=")
+        if not v:
+            continue
+        v = unquote_plus(v)
+        if k == "tag":
+            tags.append(v)
+        else:
+            params.setdefault(unquote_plus(k), v)
+    return params, tags
+
+
+def _aggregate_window(agg: str, window: Optional[str]) -> str:
+    """Flux aggregateWindow stage for ``agg=mean:1m`` (or ``agg=mean&window=1m``)."""
+    fn, _, every = agg.partition(":")
+    every = every or window
+    if fn not in _AGG_FUNCTIONS:
+        raise ValueError(f"Invalid agg function: {fn!r}. Expected one of {sorted(_AGG_FUNCTIONS)}")
+    if not every or not _FLUX_DURATION_RE.match(every):
+        raise ValueError(f"Invalid agg window: {every!r}. Expected a Flux duration such as 1m")
+    return f"|> aggregateWindow(every: {every}, fn: {fn}, createEmpty: false)"
+
+
+def _resolve_config(
+        env: str,
+        url: Optional[str] = None,
+        org: Optional[str] = None,
+        token: Optional[str] = None,
+        token_secret: Optional[str] = None,
+) -> tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Resolve (url, org, token): URI overrides first, then INFLUX_<ENV>_* env vars/secrets.
+    Missing values are returned as None; callers decide how to fail. The secret lookup is
+    cached for _SECRET_TTL_S (see _env_secret), so a rotated token is picked up.
+    """
+    influx_url = url or os.environ.get(f"INFLUX_{env}_URL")
+    influx_org = org or os.environ.get(f"INFLUX_{env}_ORG")
+    influx_token = token or _env_secret(token_secret or f"INFLUX_{env}_TOKEN")
+    return influx_url, influx_org, influx_token
+
+
+def _flux_query(k: _InfluxKey, start: str, stop: Optional[str] = None) -> str:
+    """Flux query for a parsed key over [start, stop) (start/stop already validated)."""
+    extra = []
+    if k.field:
+        extra.append(f'|> filter(fn: (r) => r._field == "{_flux_str(k.field)}")')
+    for tag in k.tags:
+        tagk, sep, tagv = tag.partition(":")
+        if sep:
+            extra.append(f'|> filter(fn: (r) => r["{_flux_str(tagk)}"] == "{_flux_str(tagv)}")')
+    if k.agg:
+        extra.append(_aggregate_window(k.agg, k.window))
+    return _FLUX_TEMPLATE.substitute(
+        bucket=_flux_str(k.bucket),
+        range=f"start: {start}, stop: {stop}" if stop else f"start: {start}",
+        measurement=_flux_str(k.measurement),
+        extra="".join(" " + stage for stage in extra),
+    )
+
+
+def _range_start(start: str, now: pd.Timestamp) -> pd.Timestamp:
+    """Absolute UTC time of a range start: a duration relative to ``now`` or an RFC3339 time/date."""
+    m = _FLUX_SIGNED_DURATION_RE.match(start)
+    if m is None:
+        t = pd.Timestamp(start)
+        return t.tz_convert("UTC") if t.tz else t.tz_localize("UTC")
+    delta = pd.Timedelta(0)
+    for n, unit in _FLUX_DURATION_PART_RE.findall(m.group(2)):
+        if unit not in _TIMEDELTA_UNITS:
+            raise ValueError(f"Range {start!r} has no fixed length (unit {unit!r}); use d/w or an RFC3339 start")
+        delta += pd.Timedelta(int(n), unit=_TIMEDELTA_UNITS[unit])
+    return now - delta if m.group(1) else now + delta
+
+
+def _flux_time(t: pd.Timestamp) -> str:
+    return t.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+@functools.lru_cache(maxsize=256)
+def _keep_columns(query: str) -> str:
+    """Add a Flux keep() stage for the core result columns, so no tag columns are sent."""
+    keep = ", ".join(f'"{c}"' for c in _FLUX_RENAMES)
+    return f"{query} |> keep(columns: [{keep}])"
+
+
+class _ResolvedKey(NamedTuple):
+    key: _InfluxKey
+    url: str
+    org: str
+    query: str
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve(key: str) -> _ResolvedKey:
+    """
+    Parse a read key, resolve its url/org and build its Flux query.
+    Cached per key: repeated reads of the same URI skip parsing, env lookups and query
+    building. Call clear_cache() after changing INFLUX_* env vars. The token is not kept
+    here: InfluxStore._token looks it up per call, under the secret TTL.
+    """
+    k = _parse_key(key)
+    env = k.env
+    range_window = k.range or "-1h"
+    if k.dtype_backend not in (None, "numpy_nullable", "pyarrow"):
+        raise ValueError(f"Invalid dtype_backend: {k.dtype_backend!r}. Expected 'numpy_nullable' or 'pyarrow'")
+
+    # ---- Resolve config: URL / ORG / TOKEN ----
+    influx_url, influx_org, _ = _resolve_config(env, k.url, k.org, k.token, k.token_secret)
+    # a missing token may still come from the run context (see InfluxStore.get),
+    # but without url/org there is nothing to retry: fail (errors are not cached)
+    if not influx_url or not influx_org:
+        raise ValueError(
+            f"Missing Influx config (env={env}). "
+            f"Need url/org/token via URL or env/secrets: "
+            f"INFLUX_{env}_URL : {influx_url}, INFLUX_{env}_ORG : {influx_org} and INFLUX_{env}_TOKEN"
+        )
+
+    # ---- Build Flux query ----
+    if not _FLUX_RANGE_RE.match(range_window):
+        raise ValueError(f"Invalid range: {range_window!r}. Expected a Flux duration (-24h) or RFC3339 time")
+    query = _flux_query(k, range_window)
+
+    return _ResolvedKey(key=k, url=influx_url, org=influx_org, query=query)
+
+
+async def _query_many(resolved: list, tokens: list) -> list:
+    """Run the queries concurrently, one async client per (url, org, token)."""
+    try:
+        import aiocsv  # noqa: F401  (parses the async query responses)
+        from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+    except ImportError as e:
+        raise ImportError(
+            "InfluxStore.get_many needs the async extra: pip install 'mlrun-influx-store[async]'"
+        ) from e
+
+    # async clients are bound to the running event loop, so they are not pooled with _get_client
+    clients = {}
+    try:
+        for r, token in zip(resolved, tokens):
+            if (r.url, r.org, token) not in clients:
+                clients[(r.url, r.org, token)] = InfluxDBClientAsync(
+                    url=r.url, token=token, org=r.org, enable_gzip=True
+                )
+
+        async def query(r, token):
+            result = await clients[(r.url, r.org, token)].query_api().query_data_frame(r.query)
+            frames = result if isinstance(result, list) else [result]
+            return _frame_from_flux(frames, r.key.dtype_backend)
+
+        return await asyncio.gather(*(query(r, token) for r, token in zip(resolved, tokens)))
+    finally:
+        for client in clients.values():
+            await client.close()
+
+
+def _run_sync(coro):
+    """asyncio.run(), also from code that already runs inside an event loop (e.g. notebooks)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def _cached_secret(source: str, name: str, lookup) -> Optional[str]:
+    """
+    lookup(name), cached per (source, name) for _SECRET_TTL_S seconds: secret backends
+    (k8s, Vault) may be remote, and tokens get rotated. Only found secrets are cached, so a
+    secret added later is picked up.
+    """
+    with _SECRET_LOCK:
+        hit = _SECRET_CACHE.get((source, name))
+        if hit is not None and time.monotonic() - hit[1] < _SECRET_TTL_S:
+            return hit[0]
+        try:
+            value = lookup(name)
+        except Exception:
+            value = None  # keep None if not set
+        if value:
+            _SECRET_CACHE[(source, name)] = (value, time.monotonic())
+        return value
+
+
+def _env_secret(name: str) -> Optional[str]:
+    """mlrun.get_secret_or_env(name), cached like run-context secrets."""
+    return _cached_secret("env", name, mlrun.get_secret_or_env)
+
+
+def _ctx_secret(ctx, name: str) -> Optional[str]:
+    """ctx.get_secret(name), cached (see _cached_secret)."""
+    return _cached_secret("ctx", name, ctx.get_secret)
+
+
+def clear_cache():
+    """Forget cached key/config resolutions (e.g. after changing INFLUX_* env vars or secrets)."""
+    with _SECRET_LOCK:
+        _SECRET_CACHE.clear()
+    _resolve.cache_clear()
+    _parse_key.cache_clear()
+
 
 class InfluxStore(DataStore):
     """
@@ -14,6 +470,8 @@ class InfluxStore(DataStore):
 
     Use URIs like:
         influx://<bucket>/<measurement>?field=<field>&tag=key:val&env=STAGING&range=-24h
+        # optional server-side downsampling (mean|sum|min|max|count|last per window):
+        &agg=mean:1m   OR   &agg=mean&window=1m
         # optional direct config overrides:
         &url=http://host:8086&org=my-org&token=...   OR   &token_secret=INFLUX_STAGING_TOKEN
 
@@ -44,91 +502,122 @@ class InfluxStore(DataStore):
         """
         if not url:
             return None  # let DataItem use its cached _body
-        item = self.get(url)
+        item = self.get(url, columns=columns)
         # noinspection PyProtectedMember,PyUnresolvedReferences
         return item._body
 
-    def get(self, key: str, size=None, offset=0,ctx=None):
+    def get(self, key: str, size=None, offset=0,ctx=None, columns=None):
         """
         Fetch from InfluxDB and return a DataItem with a pandas DataFrame as body.
 
         key format:  "bucket/measurement?field=<field>&tag=key:val&env=STAGING&range=-24h
                       [&url=...&org=...&(token=...|token_secret=...)]"
+        columns:     optional result columns to return (time/field/value/measurement and
+                     tag names). With core columns only, tags are not sent by the server.
+                     Other names (e.g. the field names InfluxTarget.as_df passes) leave the
+                     frame unprojected: the key alone cannot tell a tag from a field.
         """
-        # ---- Parse URI path & query ----
-        path, query = (key.split("?", 1) + [""])[:2]
-        if "/" not in path:
-            raise ValueError(f"Invalid key: {key}. Expected format 'bucket/measurement'")
-
-        bucket, measurement = path.split("/", 1)
-        q = parse_qs(query)
-
-        field_filter = q.get("field", [None])[0]
-        tag_filters = q.get("tag", [])
-        env = (q.get("env", ["DEV"])[0] or "DEV").upper()
-        range_window = q.get("range", ["-1h"])[0]
-
-        # direct overrides (optional)
-        url_override = q.get("url", [None])[0]
-        org_override = q.get("org", [None])[0]
-        token_inline = q.get("token", [None])[0]
-        token_secret = q.get("token_secret", [None])[0]
-
-        # ---- Resolve config: URL / ORG / TOKEN ----
-        influx_url = url_override or os.environ.get(f"INFLUX_{env}_URL")
-        influx_org = org_override or os.environ.get(f"INFLUX_{env}_ORG")
-
-        token = None
-        if token_inline:
-            token = token_inline
-        elif token_secret:
-            token = mlrun.get_secret_or_env(token_secret)
-        else:
-            token = mlrun.get_secret_or_env(f"INFLUX_{env}_TOKEN")
+        r = _resolve(key)
+        token = self._token(r, ctx)
+        core_only = bool(columns) and all(c in _RESULT_COLUMNS for c in columns)
+        query = _keep_columns(r.query) if core_only else r.query
+
+        # ---- Query InfluxDB ----
+        query_api = _get_query_api(r.url, r.org, token)
+        # the client parses the annotated CSV response straight into DataFrames;
+        # streaming keeps only one table chunk of raw CSV in flight at a time
+        df = _frame_from_flux(query_api.query_data_frame_stream(query), r.key.dtype_backend)
+        if columns and all(c in df.columns for c in columns):
+            df = df[list(columns)]
+        return self._dataitem(key, r, df)
+
+    def get_stream(self, key: str, chunk_size: int = 10_000, ctx=None):
+        """
+        Yield the result of ``key`` as DataFrames of up to ``chunk_size`` rows while the
+        response is still arriving: records are parsed one by one and only the current
+        chunk is held in memory (get() keeps whole Flux tables).
+        """
+        r = _resolve(key)
+        query_api = _get_query_api(r.url, r.org, self._token(r, ctx))
+        cols: dict[str, list] = {}
+        n = 0
+        for record in query_api.query_stream(r.query):
+            values = record.values
+            if values.keys() == cols.keys():
+                for c, v in values.items():
+                    cols[c].append(v)
+            else:  # first record, or a table with other tag columns
+                for c in values:
+                    if c not in cols:  # record order, not set order: stable tag column order
+                        cols[c] = [None] * n
+                for c, col in cols.items():
+                    col.append(values.get(c))
+            n += 1
+            if n == chunk_size:
+                yield _frame_from_flux([pd.DataFrame(cols)], r.key.dtype_backend)
+                cols, n = {}, 0
+        if n:
+            yield _frame_from_flux([pd.DataFrame(cols)], r.key.dtype_backend)
+
+    def get_iter(self, key: str, target_latency_s: float = 0.5, ctx=None):
+        """
+        Yield the result of ``key`` as DataFrames over consecutive sub-ranges of its time
+        range, oldest first, so the first rows arrive long before a wide range is read in
+        full. A sub-range doubles while its query takes less than half of
+        ``target_latency_s`` and halves when it takes longer. Empty sub-ranges are skipped.
+        Keys with agg= are read in one query (chunking would split their windows).
+        """
+        r = _resolve(key)
+        k = r.key
+        query_api = _get_query_api(r.url, r.org, self._token(r, ctx))
+        if k.agg:
+            yield _frame_from_flux(query_api.query_data_frame_stream(r.query), k.dtype_backend)
+            return
+
+        stop = pd.Timestamp.now(tz="UTC")
+        start = _range_start(k.range or "-1h", stop)
+        chunk = min(stop - start, _ITER_FIRST_CHUNK)
+        while start < stop:
+            end = min(start + chunk, stop)
+            began = time.monotonic()
+            query = _flux_query(k, _flux_time(start), _flux_time(end))
+            df = _frame_from_flux(query_api.query_data_frame_stream(query), k.dtype_backend)
+            elapsed = time.monotonic() - began
+            if len(df):
+                yield df
+            start = end
+            if elapsed < target_latency_s / 2:
+                chunk *= 2
+            elif elapsed > target_latency_s:
+                chunk = max(chunk / 2, _ITER_MIN_CHUNK)
+
+    def get_many(self, keys, ctx=None) -> list:
+        """
+        Fetch several keys concurrently (one async query per key, all in flight at once)
+        and return their DataItems in the same order. Needs ``influxdb-client[async]``.
+        """
+        resolved = [_resolve(key) for key in keys]
+        tokens = [self._token(r, ctx) for r in resolved]
+        frames = _run_sync(_query_many(resolved, tokens))
+        return [self._dataitem(key, r, df) for key, r, df in zip(keys, resolved, frames)]
+
+    @staticmethod
+    def _token(r: _ResolvedKey, ctx=None) -> str:
+        """Token for a resolved key, falling back to the run context secrets."""
+        k = r.key
+        token = _resolve_config(k.env, k.url, k.org, k.token, k.token_secret)[2]
         if not token and ctx is not None:
-            try:
-                token = ctx.get_secret(token_secret or f"INFLUX_{env}_TOKEN")
-            except Exception:
-                token = token  # keep None if not set
-        if not influx_url or not influx_org or not token:
+            token = _ctx_secret(ctx, k.token_secret or f"INFLUX_{k.env}_TOKEN")
+        if not token:
             raise ValueError(
-                f"Missing Influx config (env={env}). "
+                f"Missing Influx config (env={k.env}). "
                 f"Need url/org/token via URL or env/secrets: "
-                f"INFLUX_{env}_URL : {influx_url}, INFLUX_{env}_ORG : {influx_org} and INFLUX_{env}_TOKEN"
+                f"INFLUX_{k.env}_URL : {r.url}, INFLUX_{k.env}_ORG : {r.org} and INFLUX_{k.env}_TOKEN"
             )
+        return token
 
-        # ---- Build Flux query ----
-        query = (
-            f'from(bucket:"{bucket}") '
-            f'|> range(start: {range_window}) '
-            f'|> filter(fn: (r) => r._measurement == "{measurement}")'
-        )
-        if field_filter:
-            query += f' |> filter(fn: (r) => r._field == "{field_filter}")'
-        for tag in tag_filters:
-            if ":" in tag:
-                tagk, tagv = tag.split(":", 1)
-                query += f' |> filter(fn: (r) => r.{tagk} == "{tagv}")'
-
-        # ---- Query InfluxDB ----
-        client = InfluxDBClient(url=influx_url, token=token, org=influx_org)
-        query_api = client.query_api()
-        tables = query_api.query(query)
-
-        records = []
-        for table in tables:
-            for record in table.records:
-                # capture remaining tags
-                tags = {
-                    k: v for k, v in record.values.items()
-                    if k not in ["_time", "_field", "_value", "_measurement"]
-                }
-                records.append(
-                    (record.get_time(), record.get_field(), record.get_value(),
-                     record.get_measurement(), tags)
-                )
-
-        df = pd.DataFrame(records, columns=["time", "field", "value", "measurement", "tags"])
+    def _dataitem(self, key: str, r: _ResolvedKey, df: pd.DataFrame) -> DataItem:
+        k = r.key
 
         # ---- Wrap in DataItem (with full URL) ----
         full_url = f"influx://{key}"
@@ -140,14 +629,14 @@ class InfluxStore(DataStore):
             meta = getattr(item, "_meta", None) or getattr(item, "meta", None)
             if meta is not None:
                 meta.update({
-                    "bucket": bucket,
-                    "measurement": measurement,
-                    "field": field_filter,
-                    "tags": tag_filters,
-                    "env": env,
-                    "range": range_window,
-                    "url": influx_url,
-                    "org": influx_org,
+                    "bucket": k.bucket,
+                    "measurement": k.measurement,
+                    "field": k.field,
+                    "tags": list(k.tags),
+                    "env": k.env,
+                    "range": k.range or "-1h",
+                    "url": r.url,
+                    "org": r.org,
                 })
         except Exception:  # best-effort
             logger.warning("Could not set metadata on DataItem", exc_info=False)
@@ -159,24 +648,13 @@ class InfluxStore(DataStore):
         Write data to InfluxDB.
 
         Args:
-            key: "bucket/measurement?env=STAGING[&url=...&org=...&token=...]"
+            key: "bucket/measurement?env=STAGING[&tags=colA,colB][&url=...&org=...&token=...]"
             obj: pandas DataFrame or list of dicts
         """
         # Parse URI path & query
-        path, query = (key.split("?", 1) + [""])[:2]
-        if "/" not in path:
-            raise ValueError(f"Invalid key: {key}. Expected format 'bucket/measurement'")
-        bucket, measurement = path.split("/", 1)
-        q = parse_qs(query)
-        env = (q.get("env", ["DEV"])[0] or "DEV").upper()
-        url_override = q.get("url", [None])[0]
-        org_override = q.get("org", [None])[0]
-        token_inline = q.get("token", [None])[0]
-        token_secret = q.get("token_secret", [None])[0]
-
-        influx_url = url_override or os.environ.get(f"INFLUX_{env}_URL")
-        influx_org = org_override or os.environ.get(f"INFLUX_{env}_ORG")
-        token = token_inline or mlrun.get_secret_or_env(token_secret or f"INFLUX_{env}_TOKEN")
+        k = _parse_key(key)
+        bucket, measurement, env = k.bucket, k.measurement, k.env
+        influx_url, influx_org, token = _resolve_config(env, k.url, k.org, k.token, k.token_secret)
         if not influx_url or not influx_org or not token:
             raise ValueError(
                 f"Missing Influx config (env={env}). "
@@ -184,6 +662,25 @@ class InfluxStore(DataStore):
                 f"INFLUX_{env}_URL : {influx_url}, INFLUX_{env}_ORG : {influx_org} and INFLUX_{env}_TOKEN"
             )
 
+        # DataFrame fast path: the client serializes the frame column-wise, tag columns
+        # come from tags=. Frames with a per-row "tags" dict or without a time column
+        # (nor a DatetimeIndex) keep the record path below.
+        if (
+            isinstance(obj, pd.DataFrame)
+            and "tags" not in obj.columns
+            and ("time" in obj.columns or isinstance(obj.index, pd.DatetimeIndex))
+        ):
+            missing = [c for c in k.tag_columns if c not in obj.columns]
+            if missing:
+                raise ValueError(f"tags= columns not in the DataFrame: {missing}")
+            _write_batched(
+                influx_url, influx_org, token, bucket, obj,
+                data_frame_measurement_name=measurement,
+                data_frame_tag_columns=list(k.tag_columns),
+                data_frame_timestamp_column="time" if "time" in obj.columns else None,
+            )
+            return
+
         # Prepare data
         if isinstance(obj, pd.DataFrame):
             records = obj.to_dict(orient="records")
@@ -194,21 +691,16 @@ class InfluxStore(DataStore):
         else:
             raise ValueError("obj must be a DataFrame, dict, or list of dicts")
 
-        # Convert records to InfluxDB line protocol
-        points = []
-        for rec in records:
-            tags = rec.get("tags", {})
-            fields = {k: v for k, v in rec.items() if k not in ["time", "tags"]}
-            time = rec.get("time")
-            point = {
+        # Convert records to point dicts; consumed lazily by the batching writer
+        points = (
+            {
                 "measurement": measurement,
-                "tags": tags,
-                "fields": fields,
-                "time": time,
+                "tags": rec.get("tags", {}),
+                "fields": {k: v for k, v in rec.items() if k not in ["time", "tags"]},
+                "time": rec.get("time"),
             }
-            points.append(point)
+            for rec in records
+        )
 
-        # Write to InfluxDB
-        client = InfluxDBClient(url=influx_url, token=token, org=influx_org)
-        write_api = client.write_api()
-        write_api.write(bucket=bucket, record=points)
+        # Write to InfluxDB in batches of _WRITE_BATCH_SIZE points
+        _write_batched(influx_url, influx_org, token, bucket, points)
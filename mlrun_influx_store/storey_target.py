@@ -1,4 +1,6 @@
 # mlrun_influx_store/storey_target.py
+import time
+import weakref
 import pandas as pd
 from typing import Optional, List, Any
 from mlrun.utils import logger
@@ -53,6 +55,8 @@ class InfluxStoreyTarget:
         self.time_col = time_col
         self.tag_cols = tag_cols or []
         self.field_cols = field_cols
+        # inferred field columns per (columns, time_col, tag_cols)
+        self._field_cols_cache: dict[tuple, List[str]] = {}
 
         # Store connection overrides
         self.connection_overrides = {}
@@ -65,6 +69,9 @@ class InfluxStoreyTarget:
         if token_secret:
             self.connection_overrides["token_secret"] = token_secret
 
+        # target path, env and overrides are fixed per target: build the URI once
+        self._uri = self._build_uri()
+
         logger.info(f"Initialized InfluxStoreyTarget for {target_path}")
 
     def __call__(self, event):
@@ -74,6 +81,11 @@ class InfluxStoreyTarget:
         This method is called by Storey for each event in the stream.
         """
         try:
+            # Nothing to write: skip before building a DataFrame
+            body = getattr(event, 'body', event)
+            if isinstance(body, dict) and not body:
+                return event
+
             # Convert event to DataFrame if needed
             if hasattr(event, 'body') and isinstance(event.body, dict):
                 # Single event case
@@ -107,16 +119,7 @@ class InfluxStoreyTarget:
     def _write_dataframe_to_influx(self, df: pd.DataFrame):
         """Write DataFrame to InfluxDB using the write_df API function."""
 
-        # Build URI with query parameters
-        query_params = [f"env={self.env}"]
-
-        # Add connection overrides
-        for key, value in self.connection_overrides.items():
-            if value:
-                query_params.append(f"{key}={value}")
-
-        query_string = "&".join(query_params)
-        uri = f"influx://{self.target_path}?{query_string}"
+        uri = self._uri
 
         # Resolve column mappings
         time_col = self._resolve_time_column()
@@ -141,6 +144,18 @@ class InfluxStoreyTarget:
             logger.error(f"Failed to write to InfluxDB: {e}")
             raise
 
+    def _build_uri(self) -> str:
+        """Build the influx:// URI (env + connection overrides) for this target."""
+        query_params = [f"env={self.env}"]
+
+        # Add connection overrides
+        for key, value in self.connection_overrides.items():
+            if value:
+                query_params.append(f"{key}={value}")
+
+        query_string = "&".join(query_params)
+        return f"influx://{self.target_path}?{query_string}"
+
     def _resolve_time_column(self) -> str:
         """Resolve the time column name."""
         return (
@@ -167,19 +182,79 @@ class InfluxStoreyTarget:
         if self.field_cols:
             return self.field_cols
 
-        # Auto-infer: all columns except time and tags
-        excluded_cols = {time_col} | set(tag_cols)
-        field_cols = [c for c in df.columns if c not in excluded_cols]
+        # Auto-infer: all columns except time and tags (cached per schema)
+        key = (tuple(df.columns), time_col, tuple(tag_cols))
+        field_cols = self._field_cols_cache.get(key)
+        if field_cols is None:
+            excluded_cols = {time_col} | set(tag_cols)
+            field_cols = [c for c in df.columns if c not in excluded_cols]
+            self._field_cols_cache[key] = field_cols
 
         return field_cols if field_cols else None
 
 
 # For batch processing support
+class _ColumnBuffer:
+    """
+    Pre-sized column lists for InfluxBatchStoreyTarget: one list of ``capacity`` slots per
+    column (first-seen column order) filled by row index, so neither the dict nor the lists
+    are reallocated between batches. Like pd.DataFrame(records), values missing from an
+    event are None and columns no event of the batch had are left out.
+    """
+
+    __slots__ = ("cols", "n", "capacity", "seen", "complete")
+
+    def __init__(self, capacity: int):
+        self.cols: dict[str, list] = {}
+        self.n = 0
+        self.capacity = max(capacity, 1)
+        # columns seen in this batch: all of cols once an event had exactly those keys,
+        # else the keys collected by the slow path
+        self.seen: set = set()
+        self.complete = False
+
+    def append(self, body: dict):
+        cols, i = self.cols, self.n
+        if i == self.capacity:  # only if batch_size was raised after the buffer was sized
+            for col in cols.values():
+                col.extend([None] * self.capacity)
+            self.capacity *= 2
+        if body.keys() == cols.keys():
+            for k, v in body.items():
+                cols[k][i] = v
+            self.complete = True
+        else:
+            for k in body:
+                if k not in cols:  # dict order, not set order: columns stay in first-seen order
+                    cols[k] = [None] * self.capacity
+            # every slot of row i is written, so nothing is left over from an earlier batch
+            for k, col in cols.items():
+                col[i] = body.get(k)
+            self.seen.update(body)
+        self.n = i + 1
+
+    def frame(self) -> pd.DataFrame:
+        """The buffered rows as a DataFrame (one array per column, no per-row dicts)."""
+        n = self.n
+        cols = self.cols if self.complete else {k: c for k, c in self.cols.items() if k in self.seen}
+        return pd.DataFrame({k: col if n == len(col) else col[:n] for k, col in cols.items()})
+
+    def clear(self):
+        if not self.complete:
+            # drop columns no event of this batch had, so later events match cols again
+            for k in self.cols.keys() - self.seen:
+                del self.cols[k]
+        self.seen.clear()
+        self.complete = False
+        self.n = 0
+
+
 class InfluxBatchStoreyTarget(InfluxStoreyTarget):
     """
     Batch version of InfluxDB Storey target.
 
     Accumulates events and writes them in batches for better performance.
+    Call close() when the stream ends to write the events still buffered.
     """
 
     def __init__(self, batch_size: int = 1000, flush_interval: int = 30, **kwargs):
@@ -192,26 +267,40 @@ class InfluxBatchStoreyTarget(InfluxStoreyTarget):
         super().__init__(**kwargs)
         self.batch_size = batch_size
         self.flush_interval = flush_interval
-        self.batch_events = []
-        self.last_flush_time = pd.Timestamp.now()
+        self._buffer = _ColumnBuffer(batch_size)
+        self.last_flush_time = time.monotonic()
+        # safety net for targets that are never closed: write leftovers when the target is
+        # garbage collected or at interpreter exit; the callback never holds self
+        self._finalizer = weakref.finalize(
+            self,
+            _safe_flush,
+            self._buffer,
+            self._uri,
+            self._resolve_time_column(),
+            self._resolve_tag_columns(),
+            self.field_cols,
+        )
 
     def __call__(self, event):
         """Accumulate events and write in batches."""
         try:
-            # Add event to batch
+            # Add event to batch (empty bodies carry nothing to write)
             if hasattr(event, 'body') and isinstance(event.body, dict):
-                self.batch_events.append(event.body)
+                if not event.body:
+                    return event
+                self._buffer.append(event.body)
             elif isinstance(event, dict):
-                self.batch_events.append(event)
+                if not event:
+                    return event
+                self._buffer.append(event)
             else:
                 logger.warning(f"Unsupported event type for batching: {type(event)}")
                 return event
 
             # Check if we should flush
-            now = pd.Timestamp.now()
             should_flush = (
-                len(self.batch_events) >= self.batch_size or
-                (now - self.last_flush_time).total_seconds() >= self.flush_interval
+                self._buffer.n >= self.batch_size or
+                time.monotonic() - self.last_flush_time >= self.flush_interval
             )
 
             if should_flush:
@@ -225,31 +314,52 @@ class InfluxBatchStoreyTarget(InfluxStoreyTarget):
 
     def _flush_batch(self):
         """Flush accumulated events to InfluxDB."""
-        if not self.batch_events:
+        if not self._buffer.n:
             return
 
         try:
             # Convert batch to DataFrame
-            df = pd.DataFrame(self.batch_events)
+            df = self._buffer.frame()
 
             # Write to InfluxDB
             self._write_dataframe_to_influx(df)
 
-            logger.debug(f"Flushed {len(self.batch_events)} events to InfluxDB")
+            logger.debug(f"Flushed {self._buffer.n} events to InfluxDB")
 
             # Clear batch
-            self.batch_events.clear()
-            self.last_flush_time = pd.Timestamp.now()
+            self._buffer.clear()
+            self.last_flush_time = time.monotonic()
 
         except Exception as e:
             logger.error(f"Error flushing batch to InfluxDB: {e}")
             # Clear batch anyway to prevent infinite accumulation
-            self.batch_events.clear()
+            self._buffer.clear()
             raise
 
-    def __del__(self):
-        """Ensure final flush on cleanup."""
-        try:
-            self._flush_batch()
-        except Exception:
-            pass  # Ignore errors during cleanup
+    def close(self):
+        """Flush pending events (call when the stream ends)."""
+        self._flush_batch()
+
+
+def _safe_flush(buffer: _ColumnBuffer, uri: str, time_col: str, tag_cols: List[str],
+                field_cols: Optional[List[str]]):
+    """
+    Finalizer for InfluxBatchStoreyTarget: write what is still buffered, never raise.
+    One synchronous request, not write_df's batching writer: at interpreter exit its
+    executor takes no new work and its close() would wait for up to max_close_wait.
+    """
+    try:
+        if buffer.n:
+            from .api import _to_line_protocol, _write_target
+            from .datastore import _write_sync
+
+            bucket, measurement, url, org, token = _write_target(uri)
+            df = buffer.frame()
+            if field_cols is None:
+                field_cols = [c for c in df.columns if c not in [time_col, *tag_cols]]
+            lines = _to_line_protocol(df, measurement, time_col, tag_cols, field_cols).tolist()
+            if lines:
+                _write_sync(url, org, token, bucket, lines)
+            buffer.clear()
+    except Exception:
+        pass  # Ignore errors during cleanup
@@ -1,6 +1,6 @@
 from typing import Optional, Any, Union, List
 import pandas as pd
-from mlrun.datastore.targets import BaseStoreTarget, TargetTypes
+from mlrun.datastore.targets import BaseStoreTarget, TargetTypes, kind_to_driver
 from mlrun.data_types import is_spark_dataframe
 import mlrun
 from mlrun.utils import logger
@@ -85,6 +85,8 @@ class InfluxTarget(BaseStoreTarget):
             schema=schema,
             credentials_prefix=credentials_prefix,
         )
+        # inferred field columns per (columns, time_col, tag_cols)
+        self._field_cols_cache: dict[tuple, Optional[List[str]]] = {}
 
     def write_dataframe(
         self,
@@ -310,21 +312,35 @@ class InfluxTarget(BaseStoreTarget):
         if "field_cols" in self.attributes:
             return self.attributes["field_cols"]
 
-        # Auto-infer: all columns except time and tags
-        excluded_cols = {time_col} | set(tag_cols)
-        field_cols = [c for c in df.columns if c not in excluded_cols]
+        # Auto-infer: all columns except time and tags (cached per schema)
+        key = (tuple(df.columns), time_col, tuple(tag_cols))
+        if key not in self._field_cols_cache:
+            excluded_cols = {time_col} | set(tag_cols)
+            field_cols = [c for c in df.columns if c not in excluded_cols]
+            self._field_cols_cache[key] = field_cols if field_cols else None
+        return self._field_cols_cache[key]
 
-        return field_cols if field_cols else None
 
+def _register_influx_target():
+    """
+    Make "influx" a known MLRun target kind. This is the only place the MLRun target
+    registries are patched; it runs once, when this module is first imported.
+    """
+    TargetTypes.influx = "influx"
+
+    # Update the TargetTypes.all() method to include influx
+    original_all = TargetTypes.all
+
+    def all_with_influx():
+        result = original_all()
+        if TargetTypes.influx not in result:
+            result.append(TargetTypes.influx)
+        return result
+
+    TargetTypes.all = staticmethod(all_with_influx)
+
+    # Register the target driver
+    kind_to_driver["influx"] = InfluxTarget
 
-# Register the target type
-TargetTypes.influx = "influx"
 
-# Update the TargetTypes.all() method to include influx
-original_all = TargetTypes.all
-def all_with_influx():
-    result = original_all()
-    if TargetTypes.influx not in result:
-        result.append(TargetTypes.influx)
-    return result
-TargetTypes.all = staticmethod(all_with_influx)
+_register_influx_target()
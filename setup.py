@@ -11,13 +11,17 @@ setup(
         "influxdb-client>=1.39",
         "pandas>=1.3",
     ],
+    extras_require={
+        # InfluxStore.get_many (concurrent reads via InfluxDBClientAsync)
+        "async": ["influxdb-client[async]>=1.39"],
+    },
     entry_points={
         # MLRun 1.9.x reads this; also add v2 for forward-compat
         "mlrun.datastore": [
-            "influx = mlrun_influx_store.datastore:InfluxStore",
+            "influx = mlrun_influx_store._entrypoint:_LazyInfluxStore",
         ],
         "mlrun.datastore.v2": [
-            "influx = mlrun_influx_store.datastore:InfluxStore",
+            "influx = mlrun_influx_store._entrypoint:_LazyInfluxStore",
         ],
     },
 )
@@ -1,25 +1,44 @@
 # tests/conftest.py
-import os, subprocess, pytest
+import os, pytest, threading
 
-def _discover_docker_host():
+# Local daemon sockets, in order of preference (Linux / Docker Desktop)
+_DOCKER_SOCKETS = ("/var/run/docker.sock", os.path.expanduser("~/.docker/run/docker.sock"))
+_LOOPBACK_HOSTS = ("tcp://localhost", "tcp://127.0.0.1", "tcp://[::1]")
+_INFLUXDB_IMAGE = "influxdb:2.7"
+
+
+def _context_host():
+    """Endpoint of the current docker context, read in-process (no docker CLI fork+exec)."""
     try:
-        ctx = subprocess.check_output(["docker", "context", "show"], text=True).strip()
-        host = subprocess.check_output(
-            ["docker", "context", "inspect", ctx, "--format", '{{(index .Endpoints "docker").Host}}'],
-            text=True,
-        ).strip()
-        return host
+        from docker.context.api import ContextAPI
+
+        return ContextAPI.get_current_context().endpoints["docker"]["Host"] or None
     except Exception:
         return None
 
+
+def _discover_docker_host():
+    host = _context_host()
+    if host and not host.startswith(_LOOPBACK_HOSTS):
+        return host  # unix:// already, or a remote daemon
+    # Prefer a local unix socket over TCP loopback: much cheaper per Docker API call
+    for path in _DOCKER_SOCKETS:
+        if os.path.exists(path):
+            return f"unix://{path}"
+    return host
+
 # NEW: normalize socket for testcontainers
 def _normalize_docker_socket_for_testcontainers():
     docker_host = os.environ.get("DOCKER_HOST", "")
-    # If Desktop exposes a per-user socket, map it to the canonical path for mounts
-    if docker_host.startswith("unix://") and "/.docker/run/docker.sock" in docker_host:
-        os.environ["TESTCONTAINERS_DOCKER_SOCKET_OVERRIDE"] = "/var/run/docker.sock"
+    if not docker_host.startswith("unix://"):
+        return
+    socket_path = docker_host[len("unix://"):]
+    # Docker Desktop's per-user socket is not visible inside its VM: containers that
+    # bind-mount the socket (Ryuk) need the canonical path instead
+    if "/.docker/run/docker.sock" in socket_path:
+        socket_path = "/var/run/docker.sock"
+    os.environ.setdefault("TESTCONTAINERS_DOCKER_SOCKET_OVERRIDE", socket_path)
 
-@pytest.fixture(scope="session", autouse=True)
 def ensure_docker_host_env():
     if not os.environ.get("DOCKER_HOST"):
         host = _discover_docker_host()
@@ -35,6 +54,41 @@ def ensure_docker_host_env():
     except Exception:
         os.environ["SKIP_INTEGRATION"] = "1"
 
+
+def _pull_influxdb_image():
+    try:
+        import docker
+        docker.from_env().images.pull(_INFLUXDB_IMAGE)
+    except Exception:
+        pass  # DockerContainer pulls (and reports errors) itself if this didn't finish
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "integration: needs a Docker daemon (InfluxDB container)")
+    # Probe Docker before collection, so an unreachable daemon can skip collecting
+    # (and importing) the integration module altogether
+    if os.environ.get("SKIP_INTEGRATION") != "1":
+        ensure_docker_host_env()
+
+
+def pytest_ignore_collect(collection_path, config):
+    if os.environ.get("SKIP_INTEGRATION") == "1" and collection_path.name == "test_integration.py":
+        return True
+    return None
+
+
+def pytest_collection_finish(session):
+    # Pull the image in the background once integration tests are selected (not for unit-only
+    # or -m "not integration" runs); the container fixture then finds it warm. Under xdist
+    # every worker collects, so only the first one pulls.
+    if os.environ.get("SKIP_INTEGRATION") == "1":
+        return
+    if getattr(session.config, "workerinput", {}).get("workerid", "gw0") != "gw0":
+        return
+    if any("integration" in item.keywords for item in session.items):
+        threading.Thread(target=_pull_influxdb_image, daemon=True).start()
+
+
 def pytest_collection_modifyitems(config, items):
     if os.environ.get("SKIP_INTEGRATION") == "1":
         skip_mark = pytest.mark.skip(reason="Docker daemon not reachable for integration tests")
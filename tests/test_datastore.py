@@ -1,9 +1,375 @@
-from mlrun_influx_store import InfluxStore
-
-def test_influx_plugin_uri_parsing(monkeypatch):
-    store = InfluxStore(None, "influx", "test")
-    # Mock mlrun.get_secret_or_env and InfluxDBClient here
-    # Ensure correct parsing of URI params
-    key = "mybucket/temperature?field=temp&tag=sensor:bridge01&env=dev"
-    # For now, just check parsing works without hitting real Influx
-    assert "temperature" in key
+import pytest
+
+from mlrun_influx_store.datastore import _parse_key
+
+# write URI with inline config, so no INFLUX_* env vars/secrets are needed
+_URI_CONFIG = "url=http://influx:8086&org=my-org&token=my-token"
+
+
+class _FakeWriteApi:
+    """Records WriteApi.write calls (with the records materialized) instead of sending them."""
+
+    def __init__(self, client, write_options):
+        self.client, self.write_options = client, write_options
+
+    def write(self, bucket, org=None, record=None, **kwargs):
+        if not hasattr(record, "columns"):  # DataFrames are recorded as is
+            record = list(record)
+        self.client.writes.append((self.write_options, record, kwargs))
+
+    def close(self):
+        pass
+
+
+class _FakeClient:
+    def __init__(self):
+        self.writes = []
+
+    def write_api(self, write_options=None, **kwargs):
+        return _FakeWriteApi(self, write_options)
+
+
+class _FakeQueryApi:
+    """Answers every query with ``frame`` (raw Flux columns) and records the queries."""
+
+    def __init__(self, frame):
+        self.frame, self.queries = frame, []
+
+    def query_data_frame_stream(self, query):
+        self.queries.append(query)
+        return iter([self.frame])
+
+    def query_stream(self, query):
+        from types import SimpleNamespace
+
+        self.queries.append(query)
+        return (SimpleNamespace(values=row) for row in self.frame.to_dict("records"))
+
+
+def _flux_frame(n):
+    """``n`` rows shaped like a Flux query_data_frame table."""
+    import pandas as pd
+
+    return pd.DataFrame({
+        "result": "_result", "table": 0,
+        "_time": pd.date_range("2024-01-01", periods=n, freq="s", tz="UTC"),
+        "_value": [float(i) for i in range(n)],
+        "_field": "temp", "_measurement": "m", "sensor": "s1",
+    })
+
+
+@pytest.fixture
+def store():
+    from mlrun_influx_store.datastore import InfluxStore
+
+    return InfluxStore(parent=None, schema="influx", name="influx")
+
+
+@pytest.fixture
+def fake_query_api(monkeypatch):
+    """Stand-in for the shared query API, answering with three rows."""
+    from mlrun_influx_store import datastore
+
+    api = _FakeQueryApi(_flux_frame(3))
+    monkeypatch.setattr(datastore, "_get_query_api", lambda url, org, token: api)
+    return api
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    """Stand-in for the shared InfluxDBClient: every write is recorded, nothing is sent."""
+    from mlrun_influx_store import datastore
+
+    client = _FakeClient()
+    monkeypatch.setattr(datastore, "_get_client", lambda url, org, token: client)
+    return client
+
+
+@pytest.mark.parametrize(
+    "key, bucket, measurement, field, tags, env",
+    [
+        ("mybucket/temperature?field=temp&tag=sensor:bridge01&env=dev",
+         "mybucket", "temperature", "temp", ("sensor:bridge01",), "DEV"),
+        ("metrics/cpu_load?tag=host:server01&tag=dc:eu&env=prod",
+         "metrics", "cpu_load", None, ("host:server01", "dc:eu"), "PROD"),
+        ("sensors/humidity", "sensors", "humidity", None, (), "DEV"),
+    ],
+    ids=["field-and-tag", "repeated-tags", "defaults"],
+)
+def test_influx_plugin_uri_parsing(key, bucket, measurement, field, tags, env):
+    # Parsing only: no store, no Influx
+    k = _parse_key(key)
+    assert (k.bucket, k.measurement, k.field, k.tags, k.env) == (bucket, measurement, field, tags, env)
+
+
+@pytest.mark.parametrize(
+    "key, expected",
+    [
+        (r'my"bucket/m', r'from(bucket:"my\"bucket")'),
+        (r"b/my\meas", r'r._measurement == "my\\meas"'),
+        ("b/m?field=t${x}", r'r._field == "t\${x}"'),
+        ("b/m?field=a%0Ab", r'r._field == "a\nb"'),
+        (r'b/m?tag=site:a"b', r'r["site"] == "a\"b"'),
+        (r'b/m?tag=si"te:a', r'r["si\"te"] == "a"'),
+    ],
+    ids=["bucket-quote", "measurement-backslash", "field-interpolation", "field-newline",
+         "tag-value-quote", "tag-key-quote"],
+)
+def test_flux_query_escapes_user_values(key, expected):
+    from mlrun_influx_store.datastore import _flux_query
+
+    assert expected in _flux_query(_parse_key(key), "-1h")
+
+
+@pytest.mark.parametrize("range_", ["-1h", "-1d12h", "-30m", "2023-11-14T00:00:00Z", "2023-11-14"])
+def test_valid_range_is_used_as_is(range_):
+    from mlrun_influx_store.datastore import _resolve
+
+    assert f"range(start: {range_})" in _resolve(f"b/m?range={range_}&{_URI_CONFIG}").query
+
+
+@pytest.mark.parametrize("range_", ['-1h) |> drop(columns: ["_value"]', "now()", "-1x", "yesterday"])
+def test_invalid_range_is_rejected(range_):
+    from urllib.parse import quote
+    from mlrun_influx_store.datastore import _resolve
+
+    with pytest.raises(ValueError, match="Invalid range"):
+        _resolve(f"b/m?range={quote(range_)}&{_URI_CONFIG}")
+
+
+@pytest.mark.parametrize("agg", ["agg=mean:1m", "agg=mean&window=1m"], ids=["inline-window", "window-param"])
+def test_agg_adds_aggregate_window_before_drop(agg):
+    from mlrun_influx_store.datastore import _resolve
+
+    query = _resolve(f"b/m?{agg}&{_URI_CONFIG}").query
+    stage = "|> aggregateWindow(every: 1m, fn: mean, createEmpty: false)"
+    assert stage in query
+    # aggregateWindow needs _start/_stop, so they are dropped after it
+    assert query.index(stage) < query.index('|> drop(columns: ["_start", "_stop"])')
+
+
+@pytest.mark.parametrize(
+    "agg, message",
+    [("agg=median:1m", "agg function"), ("agg=mean:1x", "agg window"), ("agg=mean", "agg window")],
+    ids=["unknown-function", "bad-window", "no-window"],
+)
+def test_invalid_agg_is_rejected(agg, message):
+    from mlrun_influx_store.datastore import _resolve
+
+    with pytest.raises(ValueError, match=message):
+        _resolve(f"b/m?{agg}&{_URI_CONFIG}")
+
+
+def test_write_df_line_protocol():
+    import numpy as np
+    import pandas as pd
+    from mlrun_influx_store.api import _to_line_protocol
+
+    df = pd.DataFrame({
+        "time": pd.to_datetime([0, 1], unit="s", utc=True),
+        "sensor": ["bridge 01", None],
+        "temp": [21.0, np.nan],
+        "count": [1, 2],
+    })
+    lines = _to_line_protocol(df, "temperature", "time", ["sensor"], ["temp", "count"]).tolist()
+    assert lines == [
+        r"temperature,sensor=bridge\ 01 temp=21,count=1i 0",
+        "temperature count=2i 1000000000",
+    ]
+
+
+def test_write_df_line_protocol_categorical():
+    import pandas as pd
+    from mlrun_influx_store.api import _to_line_protocol
+
+    df = pd.DataFrame({
+        "time": pd.to_datetime([0, 1], unit="s", utc=True),
+        "site": pd.Categorical(["a", "b"]),
+        "status": pd.Categorical(["ok", None]),
+        "v": [1.0, 2.0],
+    })
+    lines = _to_line_protocol(df, "m", "time", ["site"], ["status", "v"]).tolist()
+    assert lines == ['m,site=a status="ok",v=1 0', "m,site=b v=2 1000000000"]
+
+
+def test_read_frame_round_trips_through_write_df(fake_client):
+    import pandas as pd
+    from mlrun_influx_store.api import write_df
+    from mlrun_influx_store.datastore import _frame_from_flux
+
+    df = _frame_from_flux([_flux_frame(2)])  # field/measurement/tags come back as categoricals
+    assert isinstance(df["sensor"].dtype, pd.CategoricalDtype)
+    write_df(f"influx://b/copy?{_URI_CONFIG}", df, tag_cols=["sensor"])  # fields inferred
+    [(_, record, _)] = fake_client.writes
+    assert record == [
+        'copy,sensor=s1 field="temp",value=0,measurement="m" 1704067200000000000',
+        'copy,sensor=s1 field="temp",value=1,measurement="m" 1704067201000000000',
+    ]
+
+
+def test_labels_from_columns_dedupes_stringified_values():
+    import pandas as pd
+    from mlrun_influx_store.api import _labels_from_columns
+
+    df = pd.DataFrame({"c": [1, "1", None, 2, "3", 4, 5]})
+    assert _labels_from_columns(df, ["c", "missing"]) == {"col_c": "1|2|3|4"}
+
+
+def test_write_records_line_protocol():
+    from mlrun_influx_store.api import _record_lines
+
+    records = [
+        {"time": 0, "sensor": "bridge01", "temp": 21.5, "status": "ok"},
+        {"time": 1, "sensor": "bridge01", "temp": float("nan")},  # no valid field -> skipped
+    ]
+    lines = list(_record_lines(records, "temperature", "time", ["sensor"], None))
+    assert lines == ['temperature,sensor=bridge01 temp=21.5,status="ok" 0']
+
+
+def test_small_writes_are_synchronous(fake_client):
+    from influxdb_client.client.write_api import SYNCHRONOUS
+    from mlrun_influx_store.api import write_records
+
+    write_records(f"influx://b/m?{_URI_CONFIG}", [{"time": 0, "v": 1}, {"time": 1, "v": 2}])
+    [(write_options, record, _)] = fake_client.writes
+    assert write_options is SYNCHRONOUS  # one request, no batching thread
+    assert record == ["m v=1i 0", "m v=2i 1"]
+
+
+def test_incomplete_config_is_not_cached(monkeypatch):
+    from mlrun_influx_store.datastore import _resolve_config
+
+    for var in ("URL", "ORG", "TOKEN"):
+        monkeypatch.delenv(f"INFLUX_CACHETEST_{var}", raising=False)
+    assert _resolve_config("CACHETEST") == (None, None, None)
+
+    # set after the failed lookup: no clear_cache() needed
+    monkeypatch.setenv("INFLUX_CACHETEST_URL", "http://influx:8086")
+    monkeypatch.setenv("INFLUX_CACHETEST_ORG", "my-org")
+    monkeypatch.setenv("INFLUX_CACHETEST_TOKEN", "my-token")
+    assert _resolve_config("CACHETEST") == ("http://influx:8086", "my-org", "my-token")
+
+
+def test_env_token_is_refreshed_after_ttl(monkeypatch):
+    from mlrun_influx_store import datastore
+
+    monkeypatch.setenv("INFLUX_TTLTEST_TOKEN", "old-token")
+    assert datastore._resolve_config("TTLTEST")[2] == "old-token"
+    monkeypatch.setenv("INFLUX_TTLTEST_TOKEN", "new-token")  # rotated
+    assert datastore._resolve_config("TTLTEST")[2] == "old-token"  # still cached
+
+    monkeypatch.setattr(datastore, "_SECRET_TTL_S", 0)  # as if the TTL had passed
+    assert datastore._resolve_config("TTLTEST")[2] == "new-token"
+
+
+def test_batch_target_flushes_when_collected(fake_client):
+    import gc
+    from influxdb_client.client.write_api import SYNCHRONOUS
+    from mlrun_influx_store.storey_target import InfluxBatchStoreyTarget
+
+    target = InfluxBatchStoreyTarget(
+        target_path="b/m", tag_cols=["sensor"], batch_size=100,
+        url="http://influx:8086", org="my-org", token="my-token",
+    )
+    target({"time": 0, "sensor": "s1", "v": 1.5})
+    assert not fake_client.writes  # still buffered
+
+    del target  # never closed: the finalizer writes the leftover event
+    gc.collect()
+    [(write_options, record, _)] = fake_client.writes
+    assert write_options is SYNCHRONOUS
+    assert record == ["m,sensor=s1 v=1.5 0"]
+
+
+def test_put_dataframe_fast_path(fake_client, store):
+    import pandas as pd
+
+    df = pd.DataFrame({"time": pd.to_datetime([0], unit="s", utc=True), "sensor": ["s1"], "v": [1.5]})
+    store.put(f"b/m?tags=sensor&{_URI_CONFIG}", df)
+    [(_, record, kwargs)] = fake_client.writes
+    assert record is df  # no per-row dict round-trip
+    assert kwargs["data_frame_measurement_name"] == "m"
+    assert kwargs["data_frame_tag_columns"] == ["sensor"]
+    assert kwargs["data_frame_timestamp_column"] == "time"
+
+    with pytest.raises(ValueError, match="sensr"):  # misspelled tag column
+        store.put(f"b/m?tags=sensr&{_URI_CONFIG}", df)
+
+
+def test_get_stream_chunks(fake_query_api, store):
+    chunks = list(store.get_stream(f"b/m?{_URI_CONFIG}", chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 1]
+    assert list(chunks[0].columns) == ["time", "field", "value", "measurement", "sensor"]
+    assert [v for c in chunks for v in c["value"]] == [0.0, 1.0, 2.0]
+
+
+def test_get_iter_covers_range_in_contiguous_chunks(fake_query_api, store):
+    import re
+
+    frames = list(store.get_iter(f"b/m?range=-3h&{_URI_CONFIG}"))
+    # fast (fake) queries: the 1h first chunk doubles, so -3h takes two queries
+    ranges = [re.search(r"range\(start: (\S+), stop: (\S+)\)", q).groups() for q in fake_query_api.queries]
+    assert len(frames) == len(ranges) == 2
+    assert ranges[0][1] == ranges[1][0]
+
+
+def test_get_many_keeps_key_order(monkeypatch, store):
+    from mlrun_influx_store import datastore
+
+    async def fake_query_many(resolved, tokens):
+        return [_flux_frame(len(r.key.measurement)) for r in resolved]
+
+    monkeypatch.setattr(datastore, "_query_many", fake_query_many)
+    items = store.get_many([f"b/aaa?{_URI_CONFIG}", f"b/a?{_URI_CONFIG}"])
+    assert [len(item._body) for item in items] == [3, 1]
+
+
+def test_column_buffer():
+    import pandas as pd
+    from mlrun_influx_store.storey_target import _ColumnBuffer
+
+    records = [{"a": 1, "b": 2}, {"a": 3, "c": 4}, {"a": 5}]  # new/missing columns, past capacity
+    buf = _ColumnBuffer(capacity=2)
+    for rec in records:
+        buf.append(rec)
+    pd.testing.assert_frame_equal(buf.frame(), pd.DataFrame(records))
+
+    buf.clear()  # slots are reused, nothing leaks from the earlier batch
+    buf.append({"a": 6, "c": 8})
+    pd.testing.assert_frame_equal(buf.frame(), pd.DataFrame([{"a": 6, "c": 8}]))  # no all-None "b"
+
+    buf.clear()  # "b" is dropped, so events with keys a/c take the fast path again
+    assert list(buf.cols) == ["a", "c"]
+    buf.append({"a": 7, "c": 9})
+    pd.testing.assert_frame_equal(buf.frame(), pd.DataFrame([{"a": 7, "c": 9}]))
+
+
+def test_ctx_secret_caches_found_secrets_only():
+    from mlrun_influx_store.datastore import _ctx_secret, clear_cache
+
+    class Ctx:
+        secrets, calls = {}, 0
+
+        def get_secret(self, name):
+            Ctx.calls += 1
+            return self.secrets.get(name)
+
+    clear_cache()
+    ctx = Ctx()
+    assert _ctx_secret(ctx, "INFLUX_CTXTEST_TOKEN") is None
+    Ctx.secrets["INFLUX_CTXTEST_TOKEN"] = "my-token"  # a missing secret is looked up again
+    assert _ctx_secret(ctx, "INFLUX_CTXTEST_TOKEN") == "my-token"
+    assert _ctx_secret(ctx, "INFLUX_CTXTEST_TOKEN") == "my-token"
+    assert Ctx.calls == 2
+
+
+def test_as_df_columns(fake_query_api, store):
+    # field names (as passed by InfluxTarget.as_df) are not result columns: nothing is dropped
+    df = store.as_df(f"b/m?field=temp&{_URI_CONFIG}", columns=["temp"])
+    assert df.shape == (3, 5)
+    assert "keep(" not in fake_query_api.queries[-1]
+
+    # core result columns only: tags are dropped server-side, the frame is projected
+    df = store.as_df(f"b/m?{_URI_CONFIG}", columns=["time", "value"])
+    assert list(df.columns) == ["time", "value"]
+    assert "keep(" in fake_query_api.queries[-1]
@@ -1,24 +1,39 @@
+import functools
+import http.client
+import os
 import time
 
-import pandas as pd
 import pytest
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
-from testcontainers.core.container import DockerContainer
 
-from mlrun_influx_store.datastore import InfluxStore
+# Seed timestamp (2023-11-14T22:13:20Z, in ns) and a range start that covers it
+_T0_NS = 1_700_000_000_000_000_000
+_T0_RANGE_START = "2023-11-14T00:00:00Z"
+
+# mlrun, pandas, influxdb_client and testcontainers are imported inside the fixtures and
+# tests that use them: collecting (or deselecting) this module stays cheap.
+
+
+def _worker_id(config) -> str:
+    """pytest-xdist worker id ("gw0", "gw1", ...), or "master" when not distributed."""
+    return getattr(config, "workerinput", {}).get("workerid", "master")
 
 
 @pytest.fixture(scope="session")
-def influxdb_container():
-    """Start InfluxDB 2.x in a Docker container."""
+def influxdb_container(request):
+    """Start InfluxDB 2.x in a Docker container (one per pytest-xdist worker)."""
+    from testcontainers.core.container import DockerContainer
+
+    worker_id = _worker_id(request.config)
+    bucket = f"test-bucket-{worker_id}"
+
     container = DockerContainer("influxdb:2.7")
+    container.with_name(f"influx-it-{worker_id}-{os.getpid()}")
     container.with_exposed_ports(8086)
     container.with_env("DOCKER_INFLUXDB_INIT_MODE", "setup")
     container.with_env("DOCKER_INFLUXDB_INIT_USERNAME", "test-user")
     container.with_env("DOCKER_INFLUXDB_INIT_PASSWORD", "test-pass")
     container.with_env("DOCKER_INFLUXDB_INIT_ORG", "test-org")
-    container.with_env("DOCKER_INFLUXDB_INIT_BUCKET", "test-bucket")
+    container.with_env("DOCKER_INFLUXDB_INIT_BUCKET", bucket)
     container.with_env("DOCKER_INFLUXDB_INIT_ADMIN_TOKEN", "test-token")
 
     container.start()
@@ -27,30 +42,62 @@ def influxdb_container():
 
     url = f"http://{host}:{port}"
     org = "test-org"
-    bucket = "test-bucket"
     token = "test-token"
 
-    # Give Influx a moment to initialize
-    time.sleep(5)
+    # Wait until Influx reports healthy (polled every 100ms, up to 15s) over one plain
+    # HTTP connection: no client objects/pools built per attempt
+    conn = http.client.HTTPConnection(host, int(port), timeout=1)
+    try:
+        for _ in range(150):
+            try:
+                conn.request("GET", "/health")
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    break
+            except (OSError, http.client.HTTPException):
+                conn.close()  # reconnects on the next request
+            time.sleep(0.1)
+        else:
+            container.stop()
+            raise RuntimeError(f"InfluxDB at {url} not ready after 15s")
+    finally:
+        conn.close()
 
     yield {"url": url, "org": org, "bucket": bucket, "token": token}
 
     container.stop()
 
 
-import os
-import mlrun
-import pytest
+@functools.lru_cache(maxsize=None)
+def _param_setter():
+    """
+    How to add run parameters to an MLClientCtx, probed once per MLRun version:
+    set_parameters() where it exists, else the private dict behind the read-only
+    (deep-copied) ``parameters`` property, else nothing (the fixture also sets env vars).
+    """
+    import mlrun
+
+    ctx_cls = mlrun.MLClientCtx
+    set_parameters = getattr(ctx_cls, "set_parameters", None)
+    if set_parameters is not None:
+        return set_parameters
+    return lambda ctx, params: getattr(ctx, "_parameters", {}).update(params)  # noqa: SLF001
+
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def setup_mlrun_project(influxdb_container):
-    """Configure a local MLRun run context with Influx settings (no API server)."""
+    """
+    Configure a local MLRun run context with Influx settings (no API server).
+    Shared by the whole session: tests must treat the returned (ctx, bucket) as read-only.
+    """
     url, org, bucket, token = (
         influxdb_container["url"],
         influxdb_container["org"],
         influxdb_container["bucket"],
         influxdb_container["token"],
     )
+    import mlrun
 
     # Offline mode – avoids API calls; warnings may still print (harmless)
     mlrun.mlconf.dbpath = ""
@@ -81,66 +128,67 @@ def setup_mlrun_project(influxdb_container):
     ctx = mlrun.get_or_create_ctx("integration-test", project=project.metadata.name)
 
     # Populate params into ctx across MLRun versions
-    try:
-        # Newer API
-        # noinspection PyUnresolvedReferences
-        ctx.set_parameters(run_params)
-    except AttributeError:
-        # Older API(s)
-        try:
-            ctx.parameters.update(run_params)
-        except Exception:
-            # Last resort – some versions keep a private dict
-            try:
-                ctx._parameters.update(run_params)  # noqa: SLF001
-            except Exception:
-                # If none of the above exist, rely on env only
-                pass
+    _param_setter()(ctx, run_params)
 
     return ctx, bucket
 
-@pytest.fixture
-def seed_influx(influxdb_container):
-    """Insert test points into InfluxDB."""
+@pytest.fixture(scope="session")
+def influx_client(influxdb_container):
+    """One InfluxDBClient (and connection pool) shared by every fixture/test in the session."""
+    from influxdb_client import InfluxDBClient
+
     client = InfluxDBClient(
         url=influxdb_container["url"],
         token=influxdb_container["token"],
         org=influxdb_container["org"],
     )
+    try:
+        yield client
+    finally:
+        client.close()
+
+
+@pytest.fixture(scope="session")
+def seed_influx(influxdb_container, influx_client):
+    """Insert test points into InfluxDB."""
+    from influxdb_client.client.write_api import SYNCHRONOUS
 
-    # Use a context manager to ensure clean close and avoid __del__ warnings
-    with client.write_api(write_options=SYNCHRONOUS) as write_api:
+    # One write_api for the whole session, closed in teardown. Synchronous, so each
+    # write() returns once the points are stored and visible to the tests that follow
+    write_api = influx_client.write_api(write_options=SYNCHRONOUS)
+    try:
         bucket = influxdb_container["bucket"]
         org    = influxdb_container["org"]
 
-        # Insert test data that matches what the test is querying for
-        # Use different timestamps to ensure both points are stored
-        import time
-        current_time = time.time_ns()
-
+        # Insert test data that matches what the test is querying for, at fixed
+        # timestamps so every run (and re-run) stores and reads identical data
+        # One payload of pre-rendered line protocol (one HTTP request, no Point objects)
         write_api.write(
             bucket=bucket,
             org=org,
             record=[
-                Point("temperature").tag("sensor", "bridge01").field("temp", 21.5).time(current_time),
-                Point("temperature").tag("sensor", "bridge01").field("temp", 22.0).time(current_time + 1000000),  # 1ms later
+                f"temperature,sensor=bridge01 temp=21.5 {_T0_NS}",
+                f"temperature,sensor=bridge01 temp=22.0 {_T0_NS + 1_000_000}",  # 1ms later
             ],
+            write_precision="ns",
         )
 
-    # Return the ready client (or just the connection info)
-    try:
-        yield client
+        # Yield the ready (shared) client
+        yield influx_client
     finally:
-        client.close()
+        write_api.close()
 
 @pytest.mark.integration
 def test_influx_store_integration(setup_mlrun_project, influxdb_container, seed_influx):
     """Integration test with a real InfluxDB instance."""
+    import pandas as pd
+    from mlrun_influx_store.datastore import InfluxStore
+
     _, bucket = setup_mlrun_project
     store = InfluxStore(None, "influx", "test")
 
     # Query data
-    key = f"{bucket}/temperature?field=temp&tag=sensor:bridge01&env=dev&range=-7d"
+    key = f"{bucket}/temperature?field=temp&tag=sensor:bridge01&env=dev&range={_T0_RANGE_START}"
     item = store.get(key)
 
     # Access DataFrame directly from the item's internal body attribute
@@ -151,11 +199,11 @@ def test_influx_store_integration(setup_mlrun_project, influxdb_container, seed_
     assert isinstance(df, pd.DataFrame)
     assert not df.empty
     assert "time" in df.columns
-    assert df["measurement"].iloc[0] == "temperature"
+    assert (df["measurement"] == "temperature").all()
 
-    # Check that we got both expected values (order may vary)
-    values = set(float(val) for val in df["value"])
-    expected_values = {21.5, 22.0}
+    # Check that we got both expected values, in time order (seed timestamps are fixed)
+    values = df.sort_values("time")["value"].to_numpy(dtype=float).tolist()
+    expected_values = [21.5, 22.0]
     assert values == expected_values, f"Expected values {expected_values}, but got {values}"
 
     # Verify we got exactly 2 records